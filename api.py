@@ -5,7 +5,7 @@ API FastAPI para o Sistema de Matching WorkSphere.
 Expõe endpoints para interagir com a lógica de matching.
 """
 
-from fastapi import FastAPI, HTTPException, Path, Query
+from fastapi import Body, FastAPI, HTTPException, Path, Query
 from typing import List, Dict, Union, Optional
 import uvicorn
 import logging
@@ -16,17 +16,22 @@ logger = logging.getLogger(__name__)
 
 # Importa a função de matching e os dados necessários
 try:
-    # A função inicializar_matcher() é chamada quando matching_logic é importado.
-    from matching_logic import encontrar_matches_para_trabalhador, trabalhadores, inicializar_matcher
+    # A importação é barata: inicializar_matcher() é chamada apenas no evento de startup.
+    from matching_logic import encontrar_matches_para_worker_idx, encontrar_matches_para_worker_idxs, inicializar_matcher, obter_estado, resolver_ids_trabalhadores
     logger.info("Módulo matching_logic importado com sucesso.")
 except ImportError as e:
     logger.error(f"Erro ao importar matching_logic: {e}")
     # Define funções dummy ou lança erro para indicar falha crítica
-    def encontrar_matches_para_trabalhador(*args, **kwargs):
+    def encontrar_matches_para_worker_idx(*args, **kwargs):
         return {"erro": "Falha crítica ao carregar a lógica de matching."}
-    trabalhadores = []
+    def encontrar_matches_para_worker_idxs(*args, **kwargs):
+        return {"erro": "Falha crítica ao carregar a lógica de matching."}
+    def resolver_ids_trabalhadores(ids, estado):
+        return ids, [], []
     def inicializar_matcher():
         pass
+    def obter_estado():
+        return None
 except Exception as e:
     logger.error(f"Erro inesperado durante a importação ou inicialização: {e}")
     raise
@@ -43,11 +48,10 @@ app = FastAPI(
 async def startup_event():
     """Função executada na inicialização da API."""
     logger.info("Iniciando a API WorkSphere Matching...")
-    # Garante que o matcher seja inicializado se ainda não foi
-    # (embora já deva ter sido na importação)
+    # Ajusta o TF-IDF e calcula a matriz de similaridade uma única vez por processo
     try:
-        inicializar_matcher() # Chama novamente para garantir ou logar status
-        logger.info("Verificação de inicialização do Matcher concluída.")
+        inicializar_matcher()
+        logger.info("Inicialização do Matcher concluída.")
     except Exception as e:
         logger.error(f"Erro durante a inicialização no startup: {e}")
 
@@ -61,15 +65,20 @@ async def startup_event():
 #     empresa: str
 #     similaridade: float
 
+# Quantidade máxima de vagas retornadas por trabalhador
+MAX_TOP_N = 100
+
 @app.get(
     "/match/trabalhador/{id_trabalhador}",
     response_model=Union[List[Dict[str, Union[str, float]]], Dict[str, str]], # Define o tipo de retorno esperado
     summary="Encontra vagas compatíveis para um trabalhador",
     tags=["Matching"] # Agrupa endpoints na documentação interativa (/docs)
 )
-async def get_matches_para_trabalhador(
+# Declarado como 'def' (e não 'async def'): o trabalho é síncrono e limitado por CPU,
+# então o FastAPI o executa no threadpool em vez de bloquear o event loop.
+def get_matches_para_trabalhador(
     id_trabalhador: str = Path(..., title="ID do Trabalhador", description="O ID único do trabalhador (ex: 't1', 't2')."),
-    top_n: Optional[int] = Query(3, title="Número de Matches", description="Quantidade máxima de vagas similares a retornar.", ge=1)
+    top_n: Optional[int] = Query(3, title="Número de Matches", description="Quantidade máxima de vagas similares a retornar.", ge=1, le=MAX_TOP_N)
 ):
     """
     Recebe o ID de um trabalhador e retorna uma lista das `top_n` vagas mais compatíveis.
@@ -78,18 +87,25 @@ async def get_matches_para_trabalhador(
     gerados a partir das habilidades/experiência do trabalhador e requisitos/descrição das vagas.
 
     - **id_trabalhador**: ID do trabalhador (obrigatório).
-    - **top_n**: Número máximo de resultados (opcional, padrão 3).
+    - **top_n**: Número máximo de resultados (opcional, padrão 3, no máximo `MAX_TOP_N`).
     """
     logger.info(f"Recebida requisição de match para trabalhador ID: {id_trabalhador}, top_n: {top_n}")
 
-    # Verifica se o trabalhador existe nos dados carregados
-    if not any(t["id"] == id_trabalhador for t in trabalhadores):
+    # Resolve o ID e busca os matches no mesmo estado, mesmo que outra thread o recarregue
+    estado = obter_estado()
+    if estado is None:
+        logger.error("Matcher indisponível: falha na inicialização.")
+        raise HTTPException(status_code=500, detail="Falha ao inicializar a matriz de similaridade.")
+
+    # Verifica se o trabalhador existe nos dados carregados (uma única busca no índice)
+    indice_trabalhador = estado.id_to_index_trabalhador.get(id_trabalhador)
+    if indice_trabalhador is None:
         logger.warning(f"Trabalhador com ID 	'{id_trabalhador}	' não encontrado.")
         raise HTTPException(status_code=404, detail=f"Trabalhador com ID 	'{id_trabalhador}	' não encontrado.")
 
     # Chama a função de lógica de matching
     try:
-        matches = encontrar_matches_para_trabalhador(id_trabalhador, top_n=top_n)
+        matches = encontrar_matches_para_worker_idx(indice_trabalhador, top_n=top_n, estado=estado)
         logger.info(f"Matches encontrados para {id_trabalhador}: {len(matches) if isinstance(matches, list) else 'Erro'}")
 
         # Verifica se houve erro interno retornado pela lógica
@@ -108,6 +124,58 @@ async def get_matches_para_trabalhador(
         logger.exception(f"Erro inesperado ao processar matches para {id_trabalhador}: {e}")
         raise HTTPException(status_code=500, detail="Ocorreu um erro interno inesperado no servidor.")
 
+# Quantidade máxima de IDs aceitos por requisição de match em lote
+MAX_IDS_LOTE = 1000
+
+@app.post(
+    "/match/batch",
+    response_model=Dict[str, List[Dict[str, Union[str, float]]]],
+    summary="Encontra vagas compatíveis para vários trabalhadores",
+    tags=["Matching"]
+)
+def get_matches_batch(
+    ids: List[str] = Body(..., title="IDs dos Trabalhadores", description="Lista de IDs de trabalhadores (ex: [\"t1\", \"t2\"]).", max_length=MAX_IDS_LOTE),
+    top_n: Optional[int] = Query(3, title="Número de Matches", description="Quantidade máxima de vagas similares a retornar por trabalhador.", ge=1, le=MAX_TOP_N)
+):
+    """
+    Recebe uma lista de IDs de trabalhadores e retorna, para cada um, as `top_n` vagas mais compatíveis.
+
+    Com a matriz de similaridade pré-calculada, cada trabalhador reaproveita o top-K da
+    consulta individual; sem ela, as similaridades são calculadas em produtos de matrizes
+    esparsas por blocos de trabalhadores.
+
+    - **ids**: Lista de IDs de trabalhadores (corpo da requisição, no máximo `MAX_IDS_LOTE`; repetidos são ignorados).
+    - **top_n**: Número máximo de resultados por trabalhador (opcional, padrão 3, no máximo `MAX_TOP_N`).
+    """
+    logger.info(f"Recebida requisição de match em lote para {len(ids)} trabalhadores, top_n: {top_n}")
+
+    estado = obter_estado()
+    if estado is None:
+        logger.error("Matcher indisponível: falha na inicialização.")
+        raise HTTPException(status_code=500, detail="Falha ao inicializar a matriz de similaridade.")
+
+    # Descarta IDs repetidos e verifica se todos os trabalhadores existem nos dados carregados
+    ids, indices, ids_desconhecidos = resolver_ids_trabalhadores(ids, estado)
+    if ids_desconhecidos:
+        logger.warning(f"Trabalhadores não encontrados: {ids_desconhecidos}")
+        raise HTTPException(status_code=404, detail=f"Trabalhadores com IDs {ids_desconhecidos} não encontrados.")
+
+    try:
+        matches = encontrar_matches_para_worker_idxs(indices, top_n=top_n, estado=estado)
+
+        # Verifica se houve erro interno retornado pela lógica
+        if isinstance(matches, dict) and "erro" in matches:
+            logger.error(f"Erro interno ao buscar matches em lote: {matches['erro']}")
+            raise HTTPException(status_code=500, detail=matches["erro"])
+
+        return dict(zip(ids, matches))
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        logger.exception(f"Erro inesperado ao processar matches em lote: {e}")
+        raise HTTPException(status_code=500, detail="Ocorreu um erro interno inesperado no servidor.")
+
 @app.get("/health", summary="Verifica a saúde da API", tags=["Status"])
 async def health_check():
     """Endpoint simples para verificar se a API está rodando."""
@@ -118,6 +186,8 @@ if __name__ == "__main__":
     # Roda o servidor Uvicorn. 'api:app' refere-se ao arquivo api.py e à instância app.
     # host="0.0.0.0" permite acesso de fora do sandbox/container.
     # reload=True reinicia o servidor automaticamente quando o código é alterado (ótimo para dev).
+    # reload=True é incompatível com múltiplos workers; em produção use, por exemplo:
+    #   uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
     logger.info("Iniciando servidor Uvicorn para desenvolvimento local em http://0.0.0.0:8000")
     uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True)
 
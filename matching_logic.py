@@ -6,12 +6,32 @@ Este módulo contém as funções para pré-processar dados, calcular a matriz
 de similaridade e encontrar matches entre trabalhadores e vagas.
 """
 
-import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import joblib
+from sklearn.base import clone
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.preprocessing import normalize
+from scipy import sparse
 import pandas as pd
 import numpy as np # Import numpy for checking NaN/None in similarity matrix
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba é opcional: sem ele, usa-se sempre o produto esparso
+    njit = None
+
+logger = logging.getLogger(__name__)
+
 # --- Dados de Exemplo ---
 # Em um sistema real, estes dados viriam de um banco de dados ou outra fonte.
 trabalhadores = [
@@ -72,112 +92,584 @@ vagas = [
     }
 ]
 
-# --- Pré-processamento de Texto ---
-def preprocessar_texto(texto):
-    """Limpa e normaliza o texto para análise."""
-    if not isinstance(texto, str):
-        return ""
-    texto = texto.lower()
-    texto = re.sub(r'\W+', ' ', texto)
-    texto = re.sub(r'\s+', ' ', texto).strip()
-    return texto
-
 # --- Criação dos Documentos para TF-IDF ---
+def _campo_texto(item, campo):
+    """Retorna o valor textual de um campo, ou string vazia se não for texto."""
+    valor = item.get(campo, '')
+    return valor if isinstance(valor, str) else ""
+
 def criar_documento(item, tipo):
-    """Combina campos relevantes em um único documento de texto."""
+    """Combina campos relevantes em um único documento de texto.
+
+    A normalização (minúsculas, acentos e tokenização) fica a cargo do
+    TfidfVectorizer, então os campos são apenas concatenados aqui.
+    """
     if tipo == 'trabalhador':
-        texto_habilidades = preprocessar_texto(item.get('habilidades', ''))
-        texto_experiencia = preprocessar_texto(item.get('experiencia', ''))
+        texto_habilidades = _campo_texto(item, 'habilidades')
+        texto_experiencia = _campo_texto(item, 'experiencia')
         return f"{texto_habilidades} {texto_experiencia}".strip()
     elif tipo == 'vaga':
-        texto_requisitos = preprocessar_texto(item.get('requisitos_habilidades', ''))
-        texto_descricao = preprocessar_texto(item.get('descricao', ''))
+        texto_requisitos = _campo_texto(item, 'requisitos_habilidades')
+        texto_descricao = _campo_texto(item, 'descricao')
         return f"{texto_requisitos} {texto_descricao}".strip()
     return ""
 
 # --- Vetorização TF-IDF e Cálculo de Similaridade ---
-# Global variables to store the fitted vectorizer and similarity matrix
-# to avoid recalculating them on every API request.
-vectorizer = TfidfVectorizer()
-matriz_similaridade_global = None
-tfidf_matrix_global = None
-docs_trabalhadores_global = []
-docs_vagas_global = []
-
-def inicializar_matcher():
-    """Prepara os dados e calcula a matriz de similaridade inicial."""
-    global vectorizer, matriz_similaridade_global, tfidf_matrix_global, docs_trabalhadores_global, docs_vagas_global
-
-    print("Inicializando o matcher...")
-    docs_trabalhadores_global = [criar_documento(t, 'trabalhador') for t in trabalhadores]
-    docs_vagas_global = [criar_documento(v, 'vaga') for v in vagas]
-
-    if not docs_trabalhadores_global or not docs_vagas_global:
-        print("Erro: Listas de documentos de trabalhadores ou vagas estão vazias durante a inicialização.")
-        return
+# O HashingVectorizer projeta os tokens num espaço de dimensão fixa (sem vocabulário
+# em memória); o TfidfTransformer aplica os pesos IDF sobre as contagens.
+vectorizer = HashingVectorizer(
+    lowercase=True,
+    strip_accents='unicode',
+    ngram_range=(1, 2),
+    token_pattern=r'(?u)\b\w+\b',
+    n_features=2**18,
+    alternate_sign=False,
+    norm=None,
+    dtype=np.float32,
+)
+# Configuração do transformer; cada inicialização ajusta um clone próprio
+tfidf_transformer = TfidfTransformer(sublinear_tf=True, norm='l2')
+# Top-K vagas pré-calculadas por trabalhador: o endpoint só precisa fatiar a lista.
+TOP_K_CACHE = 50
+
+
+@dataclass(frozen=True, eq=False)
+class EstadoMatcher:
+    """Estado derivado dos dados, montado por inteiro antes de ser publicado.
+
+    Cada requisição lê uma única referência (obter_estado()), então uma
+    reinicialização concorrente nunca expõe estruturas parcialmente montadas.
+    """
+    tfidf_transformer: TfidfTransformer
+    # Matriz TF-IDF de trabalhadores seguidos das vagas (persistida em disco)
+    tfidf_matrix: sparse.csr_matrix
+    # Linhas TF-IDF normalizadas de trabalhadores e vagas (CSR)
+    tfidf_trabalhadores: sparse.csr_matrix
+    tfidf_vagas: sparse.csr_matrix
+    # Matriz trabalhador x vaga (CSR), ou None quando grande demais para materializar
+    matriz_similaridade: Optional[sparse.csr_matrix]
+    # Mapeia o ID do trabalhador para sua linha nas matrizes
+    id_to_index_trabalhador: Dict[str, int]
+    # Top-K por trabalhador, linha a linha em ordem decrescente: índices das vagas
+    # (int32, -1 completa linhas com menos de K vagas) e similaridades (float32).
+    # None quando a matriz de similaridade não é materializada.
+    top_k_indices: Optional[np.ndarray]
+    top_k_similaridades: Optional[np.ndarray]
+    # Índice invertido das vagas: termo -> (índices das vagas, pesos TF-IDF).
+    # Usado quando a matriz de similaridade completa não é materializada.
+    indice_invertido_vagas: Dict[int, Tuple[np.ndarray, np.ndarray]]
+    # Dicionários de resposta pré-montados por vaga; cada match só copia e adiciona a similaridade
+    vaga_response_templates: List[Dict[str, str]]
+
+
+# Estado publicado; None até a primeira inicialização bem-sucedida
+_estado = None
+# Serializa as inicializações (o matching roda em paralelo no threadpool do FastAPI)
+_lock_inicializacao = threading.Lock()
+
+# --- Persistência dos Artefatos ---
+# O modelo ajustado e a matriz de similaridade são gravados em disco na primeira
+# inicialização; os demais processos (ex: workers do uvicorn) apenas os carregam,
+# mapeando a matriz de similaridade em memória (mmap) para compartilhar as páginas.
+# Cada combinação de dados/configuração tem seu próprio diretório (artifacts/<hash>/),
+# então arquivos já mapeados por outros processos nunca são sobrescritos.
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts')
+# Incrementar sempre que o formato dos artefatos ou o cálculo da similaridade mudar
+_VERSAO_ARTEFATOS = 4
+
+def _caminho_artefato(hash_dados, nome):
+    return os.path.join(ARTIFACTS_DIR, hash_dados, nome)
+
+def _hash_dados():
+    """Hash dos dados de entrada e da configuração usados para invalidar os artefatos."""
+    conteudo = json.dumps(
+        {
+            "versao": _VERSAO_ARTEFATOS,
+            "trabalhadores": trabalhadores,
+            "vagas": vagas,
+            "vectorizer": repr(vectorizer),
+            "tfidf_transformer": repr(tfidf_transformer),
+            "limite_pares_matriz": LIMITE_PARES_MATRIZ,
+            "limite_elementos_denso": LIMITE_ELEMENTOS_DENSO,
+            "top_k_cache": TOP_K_CACHE,
+            "kernel_denso": USAR_KERNEL_DENSO and cosine_sim_matrix is not None,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+def _gravar_atomico(caminho, escrever):
+    """Grava um arquivo via nome temporário no mesmo diretório e os.replace no destino.
+
+    Leitores nunca veem um arquivo parcial, e quem já mapeou a versão anterior
+    continua com o inode antigo intacto.
+    """
+    fd, caminho_tmp = tempfile.mkstemp(dir=os.path.dirname(caminho), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            escrever(f)
+        os.replace(caminho_tmp, caminho)
+    except BaseException:
+        os.unlink(caminho_tmp)
+        raise
+
+def _salvar_artefatos(hash_dados, estado):
+    """Grava o transformer, a matriz TF-IDF, a matriz de similaridade e o top-K em ARTIFACTS_DIR/<hash>."""
+    os.makedirs(os.path.join(ARTIFACTS_DIR, hash_dados), exist_ok=True)
+    _gravar_atomico(_caminho_artefato(hash_dados, 'tfidf.joblib'), lambda f: joblib.dump(estado.tfidf_transformer, f))
+    _gravar_atomico(_caminho_artefato(hash_dados, 'tfidf_mat.npz'), lambda f: sparse.save_npz(f, estado.tfidf_matrix))
+    shape = None
+    matriz_similaridade = estado.matriz_similaridade
+    if matriz_similaridade is not None:
+        # Componentes CSR em .npy separados para permitir np.load(mmap_mode='r').
+        # A matriz chega com índices ordenados (ver _calcular_similaridade), o que evita
+        # que o scipy tente reordená-los in-place no mapeamento somente leitura.
+        for componente in ('data', 'indices', 'indptr'):
+            array = getattr(matriz_similaridade, componente)
+            _gravar_atomico(_caminho_artefato(hash_dados, f'sim_{componente}.npy'), lambda f: np.save(f, array))
+        shape = list(matriz_similaridade.shape)
+        for nome, array in (('top_k_indices', estado.top_k_indices), ('top_k_sims', estado.top_k_similaridades)):
+            _gravar_atomico(_caminho_artefato(hash_dados, f'{nome}.npy'), lambda f: np.save(f, array))
+    # O metadado é escrito por último: artefatos incompletos nunca são considerados válidos
+    meta = json.dumps({"hash": hash_dados, "shape": shape}).encode('utf-8')
+    _gravar_atomico(_caminho_artefato(hash_dados, 'meta.json'), lambda f: f.write(meta))
+
+def _remover_artefatos_antigos(hash_dados):
+    """Remove os diretórios de artefatos de outros hashes (dados/configuração anteriores).
+
+    Processos que ainda mapeiam arquivos removidos continuam lendo o inode antigo.
+    """
+    for nome in os.listdir(ARTIFACTS_DIR):
+        caminho = os.path.join(ARTIFACTS_DIR, nome)
+        if nome != hash_dados and os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors=True)
+
+def _carregar_artefatos(hash_dados):
+    """Carrega os artefatos persistidos se existirem e corresponderem a 'hash_dados'.
+
+    Retorna (transformer, matriz_tfidf, matriz_similaridade, top_k), ou None
+    quando é preciso recalcular. 'top_k' é o par (índices, similaridades), ou
+    None junto com a matriz.
+    Matriz e top-K são mapeados em memória: os workers compartilham as páginas
+    do cache do sistema em vez de manter cópias próprias.
+    """
+    try:
+        with open(_caminho_artefato(hash_dados, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("hash") != hash_dados:
+            return None
+        transformer = joblib.load(_caminho_artefato(hash_dados, 'tfidf.joblib'))
+        matriz_tfidf = sparse.load_npz(_caminho_artefato(hash_dados, 'tfidf_mat.npz')).tocsr()
+        matriz_similaridade = None
+        top_k = None
+        if meta["shape"] is not None:
+            data, indices, indptr = (
+                np.load(_caminho_artefato(hash_dados, f'sim_{componente}.npy'), mmap_mode='r')
+                for componente in ('data', 'indices', 'indptr')
+            )
+            matriz_similaridade = sparse.csr_matrix((data, indices, indptr), shape=tuple(meta["shape"]), copy=False)
+            top_k = tuple(
+                np.load(_caminho_artefato(hash_dados, f'{nome}.npy'), mmap_mode='r')
+                for nome in ('top_k_indices', 'top_k_sims')
+            )
+    except FileNotFoundError:
+        # Primeira execução (ou artefatos removidos): nada a carregar
+        return None
+    except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError) as e:
+        # Artefatos truncados ou corrompidos: recalcula em vez de falhar a inicialização
+        logger.warning(f"Não foi possível carregar os artefatos persistidos: {e}")
+        return None
+
+    return transformer, matriz_tfidf, matriz_similaridade, top_k
+
+# --- Similaridade de Cosseno ---
+# Acima deste número de pares trabalhador x vaga a matriz de similaridade não é
+# materializada: as consultas passam a usar o índice invertido das vagas.
+LIMITE_PARES_MATRIZ = 50_000_000
+# O kernel Numba denso é opt-in: nos corpora medidos ele foi mais lento que o produto
+# esparso (além do custo de compilação JIT na primeira chamada). Habilite apenas se um
+# benchmark com os dados reais mostrar ganho; requer o pacote opcional 'numba'.
+USAR_KERNEL_DENSO = False
+# Acima deste número de elementos ((trabalhadores + vagas) x termos ativos) a versão
+# densa não é usada mesmo quando habilitada.
+LIMITE_ELEMENTOS_DENSO = 2_000_000
+_TAMANHO_BLOCO = 64
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def cosine_sim_matrix(A, B):
+        """Matriz de similaridade de cosseno entre as linhas de A e B (arrays densos float32)."""
+        n_a, n_termos = A.shape
+        n_b = B.shape[0]
+        inv_norma_a = np.zeros(n_a, dtype=np.float32)
+        inv_norma_b = np.zeros(n_b, dtype=np.float32)
+        for i in prange(n_a):
+            norma = np.sqrt(np.sum(A[i] * A[i]))
+            if norma > 0:
+                inv_norma_a[i] = 1.0 / norma
+        for j in prange(n_b):
+            norma = np.sqrt(np.sum(B[j] * B[j]))
+            if norma > 0:
+                inv_norma_b[j] = 1.0 / norma
+
+        resultado = np.zeros((n_a, n_b), dtype=np.float32)
+        n_blocos_a = (n_a + _TAMANHO_BLOCO - 1) // _TAMANHO_BLOCO
+        for bloco_a in prange(n_blocos_a):
+            inicio_a = bloco_a * _TAMANHO_BLOCO
+            fim_a = min(inicio_a + _TAMANHO_BLOCO, n_a)
+            # Cada bloco de linhas de B é reaproveitado por todas as linhas do bloco de A
+            for inicio_b in range(0, n_b, _TAMANHO_BLOCO):
+                fim_b = min(inicio_b + _TAMANHO_BLOCO, n_b)
+                for i in range(inicio_a, fim_a):
+                    for j in range(inicio_b, fim_b):
+                        acumulado = np.float32(0.0)
+                        for k in range(n_termos):
+                            acumulado += A[i, k] * B[j, k]
+                        resultado[i, j] = acumulado * inv_norma_a[i] * inv_norma_b[j]
+        return resultado
+else:
+    cosine_sim_matrix = None
+
+def _calcular_similaridade(tfidf_trabalhadores, tfidf_vagas):
+    """Calcula a matriz de similaridade trabalhador x vaga como CSR float32.
+
+    Por padrão usa o produto esparso. Com USAR_KERNEL_DENSO (e numba instalado),
+    corpora pequenos são restritos aos termos presentes e passam pelo kernel
+    denso; ele usa fastmath em float32, então pode diferir do produto esparso
+    na ordem de 1e-7 (e na ordem de empates). As consultas individuais e em
+    lote leem desta mesma matriz.
+    """
+    matriz = None
+    if USAR_KERNEL_DENSO and cosine_sim_matrix is not None:
+        termos_ativos = np.union1d(tfidf_trabalhadores.indices, tfidf_vagas.indices)
+        n_linhas = tfidf_trabalhadores.shape[0] + tfidf_vagas.shape[0]
+        if n_linhas * termos_ativos.size <= LIMITE_ELEMENTOS_DENSO:
+            denso_trabalhadores = np.ascontiguousarray(tfidf_trabalhadores[:, termos_ativos].toarray(), dtype=np.float32)
+            denso_vagas = np.ascontiguousarray(tfidf_vagas[:, termos_ativos].toarray(), dtype=np.float32)
+            matriz = sparse.csr_matrix(cosine_sim_matrix(denso_trabalhadores, denso_vagas))
+    if matriz is None:
+        # float32 explícito: metade da banda de memória por linha consultada em relação ao float64
+        matriz = (tfidf_trabalhadores @ tfidf_vagas.T).tocsr().astype(np.float32, copy=False)
+
+    # Linhas (row-major) contíguas: cada consulta lê um trecho sequencial de 'data'.
+    # Consultas vaga -> trabalhador devem usar uma cópia própria (ex: .tocsc()), não acesso por colunas.
+    matriz.sort_indices()
+    matriz.data = np.ascontiguousarray(matriz.data, dtype=np.float32)
+    matriz.indices = np.ascontiguousarray(matriz.indices)
+    assert matriz.data.flags['C_CONTIGUOUS'] and matriz.indices.flags['C_CONTIGUOUS']
+    return matriz
+
+
+
+def _construir_indice_invertido(tfidf_vagas):
+    """Monta o índice invertido termo -> (vagas, pesos) a partir da representação CSC."""
+    csc = tfidf_vagas.tocsc()
+    indice_invertido = {}
+    for termo in np.flatnonzero(np.diff(csc.indptr)):
+        inicio, fim = csc.indptr[termo], csc.indptr[termo + 1]
+        indice_invertido[int(termo)] = (csc.indices[inicio:fim], csc.data[inicio:fim])
+    return indice_invertido
+
+def _similaridades_por_indice_invertido(estado, indice_trabalhador):
+    """Acumula a similaridade com cada vaga percorrendo só os termos do trabalhador.
+
+    O custo é a soma das frequências de documento dos termos do trabalhador,
+    em vez de uma linha inteira da matriz trabalhador x vaga.
+    """
+    linha = estado.tfidf_trabalhadores[indice_trabalhador]
+    similaridades = np.zeros(estado.tfidf_vagas.shape[0], dtype=np.float32)
+    for termo, peso in zip(linha.indices, linha.data):
+        postagem = estado.indice_invertido_vagas.get(int(termo))
+        if postagem is not None:
+            indices_vagas, pesos_vagas = postagem
+            # Cada vaga aparece no máximo uma vez por termo, então não há índices repetidos
+            similaridades[indices_vagas] += peso * pesos_vagas
+    return similaridades
+
+def _linha_densa(matriz, indice):
+    """Expande a linha 'indice' de uma matriz CSR num vetor denso float32.
+
+    Em CSR os valores de uma linha são um trecho contíguo de 'data'/'indices',
+    então a leitura é sequencial e evita criar uma matriz esparsa de 1 linha.
+    """
+    inicio, fim = matriz.indptr[indice], matriz.indptr[indice + 1]
+    linha = np.zeros(matriz.shape[1], dtype=np.float32)
+    linha[matriz.indices[inicio:fim]] = matriz.data[inicio:fim]
+    return linha
+
+def _similaridades_trabalhador(estado, indice_trabalhador):
+    """Vetor denso de similaridades de um trabalhador com todas as vagas."""
+    if estado.matriz_similaridade is not None:
+        return _linha_densa(estado.matriz_similaridade, indice_trabalhador)
+    return _similaridades_por_indice_invertido(estado, indice_trabalhador)
+
+def _indices_top_k(similaridades, k):
+    """Retorna os índices das 'k' maiores similaridades positivas, em ordem decrescente."""
+    k = min(k, similaridades.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    indices_top = np.argpartition(-similaridades, k - 1)[:k]
+    indices_top = indices_top[np.argsort(-similaridades[indices_top], kind="stable")]
+    # Descarta similaridades NaN ou não positivas (NaN > 0 é False)
+    return indices_top[similaridades[indices_top] > 0]
+
+def _calcular_top_k_cache(matriz_similaridade):
+    """Pré-calcula as TOP_K_CACHE melhores vagas de cada trabalhador.
+
+    Retorna as matrizes (T, TOP_K_CACHE) de índices (int32, -1 nas posições
+    vazias) e de similaridades (float32, 0 nas posições vazias).
+    """
+    n_trabalhadores = matriz_similaridade.shape[0]
+    top_k_indices = np.full((n_trabalhadores, TOP_K_CACHE), -1, dtype=np.int32)
+    top_k_similaridades = np.zeros((n_trabalhadores, TOP_K_CACHE), dtype=np.float32)
+    for indice in range(n_trabalhadores):
+        similaridades = _linha_densa(matriz_similaridade, indice)
+        indices_top = _indices_top_k(similaridades, TOP_K_CACHE)
+        top_k_indices[indice, :indices_top.size] = indices_top
+        top_k_similaridades[indice, :indices_top.size] = similaridades[indices_top]
+    return top_k_indices, top_k_similaridades
+
+def _montar_estado(hash_dados):
+    """Carrega (ou calcula e persiste) todo o estado do matcher, sem publicá-lo.
+
+    Retorna None se os dados estiverem vazios ou o ajuste do TF-IDF falhar.
+    """
+    docs_trabalhadores = [criar_documento(t, 'trabalhador') for t in trabalhadores]
+    docs_vagas = [criar_documento(v, 'vaga') for v in vagas]
+
+    if not docs_trabalhadores or not docs_vagas:
+        logger.error("Listas de documentos de trabalhadores ou vagas estão vazias durante a inicialização.")
+        return None
+
+    n_trabalhadores = len(docs_trabalhadores)
+    artefatos = _carregar_artefatos(hash_dados)
+    carregado = artefatos is not None
+    if carregado:
+        transformer, tfidf_matrix, matriz_similaridade, top_k = artefatos
+    else:
+        transformer = clone(tfidf_transformer)
+        try:
+            tfidf_matrix = transformer.fit_transform(vectorizer.transform(docs_trabalhadores + docs_vagas))
+        except ValueError as e:
+            logger.error(f"Erro ao ajustar o vetorizador TF-IDF durante a inicialização: {e}")
+            return None
+        matriz_similaridade = None
+        top_k = None
+
+    # Mantém as matrizes esparsas (CSR): com linhas normalizadas em L2, a
+    # similaridade de cosseno é o produto esparso Xt @ Xv.T, cujo custo
+    # depende apenas dos elementos não nulos.
+    tfidf_trabalhadores = normalize(tfidf_matrix[:n_trabalhadores], norm='l2', copy=False)
+    tfidf_vagas = normalize(tfidf_matrix[n_trabalhadores:], norm='l2', copy=False)
+    if not carregado and n_trabalhadores * len(docs_vagas) <= LIMITE_PARES_MATRIZ:
+        matriz_similaridade = _calcular_similaridade(tfidf_trabalhadores, tfidf_vagas)
+        top_k = _calcular_top_k_cache(matriz_similaridade)
+    top_k_indices, top_k_similaridades = top_k if top_k is not None else (None, None)
+
+    estado = EstadoMatcher(
+        tfidf_transformer=transformer,
+        tfidf_matrix=tfidf_matrix,
+        tfidf_trabalhadores=tfidf_trabalhadores,
+        tfidf_vagas=tfidf_vagas,
+        matriz_similaridade=matriz_similaridade,
+        id_to_index_trabalhador={t['id']: i for i, t in enumerate(trabalhadores)},
+        top_k_indices=top_k_indices,
+        top_k_similaridades=top_k_similaridades,
+        indice_invertido_vagas=_construir_indice_invertido(tfidf_vagas) if matriz_similaridade is None else {},
+        vaga_response_templates=[
+            dict(id_vaga=v['id'], titulo_vaga=v['titulo'], empresa=v['empresa']) for v in vagas
+        ],
+    )
+
+    if carregado:
+        logger.debug("Matcher inicializado a partir dos artefatos persistidos.")
+        return estado
 
-    todos_docs = docs_trabalhadores_global + docs_vagas_global
     try:
-        tfidf_matrix_global = vectorizer.fit_transform(todos_docs)
-        tfidf_trabalhadores = tfidf_matrix_global[:len(docs_trabalhadores_global)]
-        tfidf_vagas = tfidf_matrix_global[len(docs_trabalhadores_global):]
-        matriz_similaridade_global = cosine_similarity(tfidf_trabalhadores, tfidf_vagas)
-        print("Matcher inicializado com sucesso.")
-    except ValueError as e:
-        print(f"Erro ao ajustar o vetorizador TF-IDF durante a inicialização: {e}")
-        matriz_similaridade_global = None
+        _salvar_artefatos(hash_dados, estado)
+        _remover_artefatos_antigos(hash_dados)
+    except OSError as e:
+        logger.warning(f"Não foi possível persistir os artefatos do matcher: {e}")
+    logger.debug("Matcher inicializado com sucesso.")
+    return estado
+
+def inicializar_matcher(forcar=False):
+    """Prepara os dados e calcula a matriz de similaridade inicial.
+
+    Chamadas repetidas não fazem nada após uma inicialização bem-sucedida,
+    a menos que 'forcar' seja True (ex: após recarregar trabalhadores/vagas).
+    O novo estado é montado por inteiro e só então substitui o anterior, que
+    continua atendendo requisições concorrentes até a troca.
+    """
+    global _estado
+
+    if _estado is not None and not forcar:
+        return
+    with _lock_inicializacao:
+        # Outra thread pode ter inicializado enquanto esperávamos o lock
+        if _estado is not None and not forcar:
+            return
+        logger.debug("Inicializando o matcher...")
+        estado = _montar_estado(_hash_dados())
+        if estado is None:
+            return
+        _estado = estado
+        clear_matches_cache()
+
+def obter_estado():
+    """Retorna o estado atual, inicializando sob demanda se o startup não o fez.
+
+    Retorna None se a inicialização falhar. Use o mesmo estado para resolver o
+    ID e buscar os matches, para que ambos vejam os mesmos dados.
+    """
+    estado = _estado
+    if estado is None:
+        logger.warning("Matcher não foi inicializado corretamente.")
+        inicializar_matcher()
+        estado = _estado
+    return estado
 
 # --- Função de Matching ---
 def encontrar_matches_para_trabalhador(id_trabalhador, top_n=3):
-    """Encontra as 'top_n' vagas mais similares para um dado trabalhador."""
-    global matriz_similaridade_global
+    """Encontra as 'top_n' vagas mais similares para um dado trabalhador.
 
-    if matriz_similaridade_global is None or not isinstance(matriz_similaridade_global, np.ndarray):
-        print("Erro: Matriz de similaridade não foi inicializada corretamente.")
-        # Tenta inicializar se ainda não foi
-        inicializar_matcher()
-        if matriz_similaridade_global is None or not isinstance(matriz_similaridade_global, np.ndarray):
-             return {"erro": "Falha ao inicializar a matriz de similaridade."}
+    Mantida por compatibilidade: resolve o ID e delega para
+    encontrar_matches_para_worker_idx.
+    """
+    estado = obter_estado()
+    if estado is None:
+        return {"erro": "Falha ao inicializar a matriz de similaridade."}
 
-    try:
-        indice_trabalhador = next(i for i, t in enumerate(trabalhadores) if t['id'] == id_trabalhador)
-    except StopIteration:
-        print(f"Erro: Trabalhador com ID '{id_trabalhador}' não encontrado.")
+    indice_trabalhador = estado.id_to_index_trabalhador.get(id_trabalhador)
+    if indice_trabalhador is None:
+        logger.warning(f"Trabalhador com ID '{id_trabalhador}' não encontrado.")
         return {"erro": f"Trabalhador com ID '{id_trabalhador}' não encontrado."}
 
-    if indice_trabalhador >= matriz_similaridade_global.shape[0]:
-         print(f"Erro: Índice do trabalhador ({indice_trabalhador}) fora dos limites da matriz de similaridade ({matriz_similaridade_global.shape[0]}).")
+    return encontrar_matches_para_worker_idx(indice_trabalhador, top_n=top_n, estado=estado)
+
+def encontrar_matches_para_worker_idx(indice_trabalhador: int, top_n: int = 3, estado: Optional[EstadoMatcher] = None):
+    """Encontra as 'top_n' vagas mais similares para o trabalhador na linha 'indice_trabalhador'.
+
+    O índice deve ter sido obtido de 'estado.id_to_index_trabalhador'; sem
+    'estado', usa o estado atual.
+    """
+    if estado is None:
+        estado = obter_estado()
+        if estado is None:
+            return {"erro": "Falha ao inicializar a matriz de similaridade."}
+
+    if indice_trabalhador >= estado.tfidf_trabalhadores.shape[0]:
+         logger.warning(f"Índice do trabalhador ({indice_trabalhador}) fora dos limites da matriz de similaridade ({estado.tfidf_trabalhadores.shape[0]}).")
          return {"erro": "Índice do trabalhador fora dos limites da matriz."}
 
-    similaridades_vagas = matriz_similaridade_global[indice_trabalhador]
+    return _montar_matches(estado, _matches_top_para_worker_idx(estado, indice_trabalhador, top_n))
+
+def _matches_top_para_worker_idx(estado, indice_trabalhador, top_n):
+    """Pares (indice_vaga, similaridade) das 'top_n' melhores vagas, como tupla imutável."""
+    # Não há mais que n_vagas resultados: limitar 'top_n' evita chaves de cache equivalentes
+    top_n = min(top_n, estado.tfidf_vagas.shape[0])
+    if top_n <= TOP_K_CACHE and estado.top_k_indices is not None:
+        # Caminho rápido: a linha já está ordenada, basta fatiar e descartar o preenchimento
+        indices_top = estado.top_k_indices[indice_trabalhador, :top_n]
+        validos = indices_top >= 0
+        return tuple(zip(
+            indices_top[validos].tolist(),
+            estado.top_k_similaridades[indice_trabalhador, :top_n][validos].tolist(),
+        ))
+    return _matches_top_calculados(estado, indice_trabalhador, top_n)
 
-    # Verifica se similaridades_vagas é válido
-    if similaridades_vagas is None or not isinstance(similaridades_vagas, np.ndarray):
-        print(f"Erro: Vetor de similaridade inválido para o trabalhador {id_trabalhador}.")
-        return {"erro": "Vetor de similaridade inválido."}
+@lru_cache(maxsize=4096)
+def _matches_top_calculados(estado, indice_trabalhador, top_n):
+    """Top-N calculado a partir da linha de similaridades completa.
 
-    # Cria pares (índice_vaga, similaridade) e ordena
-    matches_ordenados = sorted(enumerate(similaridades_vagas), key=lambda item: item[1], reverse=True)
+    Só é memoizado o que o top-K pré-calculado não responde; o estado faz parte
+    da chave, e o cache é limpo a cada novo estado publicado.
+    """
+    similaridades_vagas = _similaridades_trabalhador(estado, indice_trabalhador)
+    return tuple(
+        (int(j), float(similaridades_vagas[j])) for j in _indices_top_k(similaridades_vagas, top_n)
+    )
 
+def clear_matches_cache():
+    """Descarta os resultados memoizados de matching (chamar ao recarregar os dados)."""
+    _matches_top_calculados.cache_clear()
+
+def _montar_matches(estado, matches_top):
+    """Converte pares (indice_vaga, similaridade) nos dicionários de resposta."""
+    templates = estado.vaga_response_templates
     resultado_matches = []
-    for indice_vaga, similaridade in matches_ordenados[:top_n]:
-        # Check for NaN or invalid similarity values
-        if np.isnan(similaridade) or similaridade <= 0:
-            continue
-        if indice_vaga < len(vagas):
-            vaga = vagas[indice_vaga]
-            resultado_matches.append({
-                "id_vaga": vaga['id'],
-                "titulo_vaga": vaga['titulo'],
-                "empresa": vaga['empresa'],
-                "similaridade": round(float(similaridade), 4) # Converte para float nativo
-            })
+    for indice_vaga, similaridade in matches_top:
+        if indice_vaga < len(templates):
+            match = templates[indice_vaga].copy()
+            match["similaridade"] = round(similaridade, 4)
+            resultado_matches.append(match)
         else:
-             print(f"Aviso: Índice de vaga {indice_vaga} fora dos limites da lista de vagas.")
+             logger.warning(f"Índice de vaga {indice_vaga} fora dos limites da lista de vagas.")
 
     return resultado_matches
 
-# Inicializa o matcher quando o módulo é carregado
-# Em uma aplicação real, isso pode ser feito de forma mais robusta (ex: lazy loading)
-inicializar_matcher()
 
+# Limite de elementos do bloco denso (trabalhadores x vagas) no matching em lote sem matriz
+LIMITE_ELEMENTOS_LOTE = 10_000_000
+
+def resolver_ids_trabalhadores(ids_trabalhadores, estado):
+    """Descarta IDs repetidos (mantendo a ordem) e os resolve para linhas das matrizes.
+
+    Retorna (ids_unicos, indices, ids_desconhecidos); 'indices' só é completo
+    quando 'ids_desconhecidos' está vazio.
+    """
+    ids_unicos = list(dict.fromkeys(ids_trabalhadores))
+    indices = [estado.id_to_index_trabalhador.get(i) for i in ids_unicos]
+    ids_desconhecidos = [i for i, indice in zip(ids_unicos, indices) if indice is None]
+    return ids_unicos, indices, ids_desconhecidos
+
+def encontrar_matches_em_lote(ids_trabalhadores, top_n=3):
+    """Encontra as 'top_n' vagas mais similares para vários trabalhadores de uma vez.
+
+    Mantida por compatibilidade: resolve os IDs (repetidos são considerados uma
+    única vez) e delega para encontrar_matches_para_worker_idxs.
+    Retorna um dicionário {id_trabalhador: [matches]}.
+    """
+    estado = obter_estado()
+    if estado is None:
+        return {"erro": "Falha ao inicializar a matriz de similaridade."}
+
+    ids_trabalhadores, indices, ids_desconhecidos = resolver_ids_trabalhadores(ids_trabalhadores, estado)
+    if ids_desconhecidos:
+        logger.warning(f"Trabalhadores não encontrados: {ids_desconhecidos}")
+        return {"erro": f"Trabalhadores com IDs {ids_desconhecidos} não encontrados."}
+
+    return dict(zip(ids_trabalhadores, encontrar_matches_para_worker_idxs(indices, top_n=top_n, estado=estado)))
+
+def encontrar_matches_para_worker_idxs(indices_trabalhadores, top_n: int = 3, estado: Optional[EstadoMatcher] = None):
+    """Encontra as 'top_n' vagas mais similares para cada linha em 'indices_trabalhadores'.
+
+    Com a matriz de similaridade materializada, cada trabalhador usa o mesmo
+    caminho (top-K pré-calculado + cache) da consulta individual. Sem ela, as
+    linhas TF-IDF são multiplicadas pelas vagas em produtos esparsos por blocos,
+    limitando o tamanho do resultado denso a LIMITE_ELEMENTOS_LOTE.
+    Os índices devem vir de 'estado.id_to_index_trabalhador'; sem 'estado', usa
+    o estado atual. Retorna uma lista de matches por índice, na mesma ordem.
+    """
+    if estado is None:
+        estado = obter_estado()
+        if estado is None:
+            return {"erro": "Falha ao inicializar a matriz de similaridade."}
+
+    if estado.matriz_similaridade is not None:
+        return [
+            _montar_matches(estado, _matches_top_para_worker_idx(estado, indice, top_n))
+            for indice in indices_trabalhadores
+        ]
+
+    resultado = []
+    tamanho_bloco = max(1, LIMITE_ELEMENTOS_LOTE // estado.tfidf_vagas.shape[0])
+    for inicio in range(0, len(indices_trabalhadores), tamanho_bloco):
+        bloco = np.array(indices_trabalhadores[inicio:inicio + tamanho_bloco], dtype=np.intp)
+        similaridades_bloco = (estado.tfidf_trabalhadores[bloco] @ estado.tfidf_vagas.T).astype(np.float32, copy=False).toarray()
+        for linha in similaridades_bloco:
+            resultado.append(_montar_matches(
+                estado, [(int(j), float(linha[j])) for j in _indices_top_k(linha, top_n)]
+            ))
+    return resultado
@@ -0,0 +1,16 @@
+#!/usr/bin/env sh
+# Sobe a API em produção com múltiplos workers (gunicorn + UvicornWorker).
+#
+# Os artefatos do matcher (TF-IDF e matriz de similaridade) são gerados uma única
+# vez antes de subir os workers; cada worker apenas os carrega no evento de startup,
+# mapeando a matriz de similaridade em memória (mmap) e compartilhando as páginas.
+set -e
+
+cd "$(dirname "$0")/.."
+
+WORKERS="${WORKERS:-$(nproc)}"
+BIND="${BIND:-0.0.0.0:8000}"
+
+python -c "import matching_logic; matching_logic.inicializar_matcher()"
+
+exec gunicorn -k uvicorn.workers.UvicornWorker -w "$WORKERS" --preload api:app --bind "$BIND"
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do caminho sem matriz de similaridade materializada.
+
+Com LIMITE_PARES_MATRIZ e LIMITE_ELEMENTOS_LOTE zerados, as consultas usam o
+índice invertido e o lote usa produtos esparsos de um trabalhador por bloco;
+os resultados devem ser idênticos aos obtidos com a matriz materializada.
+"""
+
+import pytest
+
+import matching_logic
+
+
+IDS_TRABALHADORES = [t['id'] for t in matching_logic.trabalhadores]
+TOP_N = len(matching_logic.vagas)
+
+
+def _resultados():
+    """Matches individuais e em lote de todos os trabalhadores no estado atual."""
+    individuais = {
+        id_trabalhador: matching_logic.encontrar_matches_para_trabalhador(id_trabalhador, top_n=TOP_N)
+        for id_trabalhador in IDS_TRABALHADORES
+    }
+    lote = matching_logic.encontrar_matches_em_lote(IDS_TRABALHADORES, top_n=TOP_N)
+    return individuais, lote
+
+
+@pytest.fixture
+def matcher_isolado(monkeypatch, tmp_path):
+    """Isola os artefatos e o estado publicado do matcher durante o teste."""
+    monkeypatch.setattr(matching_logic, 'ARTIFACTS_DIR', str(tmp_path))
+    monkeypatch.setattr(matching_logic, '_estado', None)
+    yield
+    matching_logic.clear_matches_cache()
+
+
+@pytest.fixture
+def resultados_com_matriz(matcher_isolado):
+    matching_logic.inicializar_matcher(forcar=True)
+    assert matching_logic.obter_estado().matriz_similaridade is not None
+    return _resultados()
+
+
+def test_sem_matriz_igual_a_matriz_materializada(resultados_com_matriz, monkeypatch):
+    monkeypatch.setattr(matching_logic, 'LIMITE_PARES_MATRIZ', 0)
+    monkeypatch.setattr(matching_logic, 'LIMITE_ELEMENTOS_LOTE', 0)
+    matching_logic.inicializar_matcher(forcar=True)
+    assert matching_logic.obter_estado().matriz_similaridade is None
+
+    individuais, lote = _resultados()
+
+    assert individuais == resultados_com_matriz[0]
+    assert lote == resultados_com_matriz[1]
+    assert lote == individuais
+
+
+@pytest.mark.parametrize('limite_pares', [matching_logic.LIMITE_PARES_MATRIZ, 0])
+def test_recarga_dos_artefatos_igual_ao_calculo(resultados_com_matriz, monkeypatch, limite_pares):
+    monkeypatch.setattr(matching_logic, 'LIMITE_PARES_MATRIZ', limite_pares)
+    monkeypatch.setattr(matching_logic, 'LIMITE_ELEMENTOS_LOTE', 0)
+    matching_logic.inicializar_matcher(forcar=True)
+
+    # A segunda inicialização deve vir dos artefatos em disco, sem reajustar o TF-IDF
+    def _ajuste_proibido(*args, **kwargs):
+        raise AssertionError("o TF-IDF foi reajustado em vez de carregado dos artefatos")
+    monkeypatch.setattr(matching_logic, 'clone', _ajuste_proibido)
+    matching_logic.inicializar_matcher(forcar=True)
+
+    assert (matching_logic.obter_estado().matriz_similaridade is None) == (limite_pares == 0)
+    assert _resultados() == resultados_com_matriz